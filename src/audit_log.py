@@ -0,0 +1,349 @@
+import atexit
+import bisect
+import fcntl
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+from generate_rule_hash import CONFIG_PATH, compute_hash
+
+# ── Audit log location ──
+AUDIT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "audit_log"
+)
+
+# Active segment is sealed and a new one started past this size
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+
+# How often flush() re-checks that the writer thread is still alive
+FLUSH_POLL_SECONDS = 0.1
+
+SEGMENT_PATTERN = re.compile(r'^segment-(w\d+)-(\d+)\.jsonl$')
+
+_STOP = object()
+
+
+def _segment_name(writer, number):
+    return f"segment-{writer}-{number:06d}.jsonl"
+
+
+def _scan_segment(path):
+    """
+    Read every complete entry of a segment.
+    Returns (entries, end) where entries are (offset, entry) pairs and end is
+    the offset after the last complete line — a torn final write (no
+    trailing newline) is left out. Complete lines that fail to parse are skipped.
+    """
+    entries = []
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entries.append((offset, json.loads(line)))
+            except ValueError:
+                pass
+            offset += len(line)
+    return entries, offset
+
+
+class AuditLog:
+    """
+    Append-only verdict log stored as JSONL segments.
+    record() only enqueues — a background writer thread serializes entries,
+    rotates segments and maintains the in-memory indexes, so callers on the
+    validation path never wait on disk I/O.
+
+    Each process claims its own writer prefix (w0, w1, ...) by holding an
+    exclusive flock on 'writer-<prefix>.lock', and only ever appends to,
+    truncates or seals segments under that prefix. Segments of other writers
+    are indexed read-only as they were when the log was opened.
+    Sealed segments get a sidecar '<segment>.idx.json' so reopening the log
+    only rescans unsealed segments.
+    """
+
+    def __init__(self, directory=AUDIT_DIR, segment_max_bytes=SEGMENT_MAX_BYTES):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._by_rule_hash = {}
+        self._by_output = {}
+        self._times = []
+        self._locations = []
+        self._timestamp_of = {}
+        self._segment_entries = []
+
+        self._writer_id, self._lock_file = self._claim_writer()
+        self._segment_number = self._load_index()
+        self._file = open(self._segment_path(self._segment_number), "ab")
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run_writer, name="audit-log-writer", daemon=True)
+        self._writer.start()
+
+    def _claim_writer(self):
+        """Take the first writer prefix whose lock file no other process holds."""
+        n = 0
+        while True:
+            writer = f"w{n}"
+            lock_file = open(os.path.join(self.directory, f"writer-{writer}.lock"), "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                n += 1
+                continue
+            return writer, lock_file
+
+    def _segment_path(self, number, writer=None):
+        return os.path.join(self.directory, _segment_name(writer or self._writer_id, number))
+
+    # ── Writing ──
+
+    def record(self, entry):
+        """Queue an entry for writing. Adds a timestamp if missing."""
+        if self._closed:
+            raise RuntimeError("Audit log is closed")
+        entry = dict(entry)
+        entry.setdefault("timestamp", time.time())
+        self._queue.put(entry)
+
+    def flush(self):
+        """
+        Block until every queued entry has been handled by the writer.
+        Raises RuntimeError instead of waiting forever if the writer is gone.
+        """
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if not self._writer.is_alive():
+                    raise RuntimeError(
+                        f"Audit log writer thread is not running — {self._queue.unfinished_tasks} entries not written"
+                    )
+                self._queue.all_tasks_done.wait(FLUSH_POLL_SECONDS)
+
+    def close(self):
+        """
+        Drain the queue and stop the writer thread. The active segment stays
+        unsealed and is rescanned on the next open.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._file.close()
+        self._lock_file.close()
+
+    def _run_writer(self):
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is _STOP:
+                    return
+                self._write_or_reject(entry)
+            finally:
+                # Always mark the entry done so flush() can never hang on it
+                self._queue.task_done()
+
+    def _write_or_reject(self, entry):
+        """Write one entry; on any failure record it as rejected and carry on."""
+        try:
+            self._write(entry)
+        except Exception as e:
+            self._report_failure(entry, e)
+
+    def _report_failure(self, entry, error):
+        print(f"⚠️  Audit log write failed: {error!r}", file=sys.stderr)
+        try:
+            path = os.path.join(self.directory, f"rejected-{self._writer_id}.log")
+            with open(path, "a") as f:
+                f.write(json.dumps({
+                    "timestamp": time.time(),
+                    "error": repr(error),
+                    "entry": repr(entry),
+                }) + "\n")
+        except OSError:
+            pass
+
+    def _write(self, entry):
+        # Serialize first — an unserializable entry never touches the segment.
+        # Each line is flushed on its own so the index never points past the
+        # data actually on disk.
+        line = json.dumps(entry, sort_keys=True).encode("utf-8") + b"\n"
+        offset = self._file.tell()
+        try:
+            self._file.write(line)
+            self._file.flush()
+        except OSError:
+            # Drop any partial line so the segment stays parseable
+            try:
+                self._file.truncate(offset)
+                self._file.seek(offset)
+            except OSError:
+                pass
+            raise
+        self._index(entry, (_segment_name(self._writer_id, self._segment_number), offset))
+        self._segment_entries.append(
+            [offset, entry["timestamp"], entry.get("rule_hash"), entry.get("output_variable")]
+        )
+        if self._file.tell() >= self.segment_max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        self._seal(_segment_name(self._writer_id, self._segment_number), self._segment_entries)
+        self._segment_number += 1
+        self._segment_entries = []
+        self._file = open(self._segment_path(self._segment_number), "ab")
+
+    def _seal(self, segment, entries):
+        path = os.path.join(self.directory, segment + ".idx.json")
+        with open(path, "w") as f:
+            json.dump(entries, f)
+
+    # ── Indexing ──
+
+    def _index(self, entry, location):
+        with self._lock:
+            rule_hash = entry.get("rule_hash")
+            output = entry.get("output_variable")
+            if rule_hash:
+                self._by_rule_hash.setdefault(rule_hash, []).append(location)
+            if output:
+                self._by_output.setdefault(output, []).append(location)
+            self._timestamp_of[location] = entry["timestamp"]
+            position = bisect.bisect_right(self._times, entry["timestamp"])
+            self._times.insert(position, entry["timestamp"])
+            self._locations.insert(position, location)
+
+    def _load_index(self):
+        """
+        Rebuild the indexes from every writer's segments and return this
+        writer's active segment number. Only segments under the claimed
+        prefix are truncated or sealed.
+        """
+        segments = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                segments.append((match.group(1), int(match.group(2)), name))
+        segments.sort()
+
+        own = [number for writer, number, _ in segments if writer == self._writer_id]
+        active = own[-1] if own else 1
+
+        for writer, number, name in segments:
+            is_own = writer == self._writer_id
+            idx_path = os.path.join(self.directory, name + ".idx.json")
+            if not (is_own and number == active) and os.path.exists(idx_path):
+                with open(idx_path, "r") as f:
+                    for offset, timestamp, rule_hash, output in json.load(f):
+                        self._index(
+                            {"timestamp": timestamp, "rule_hash": rule_hash, "output_variable": output},
+                            (name, offset)
+                        )
+                continue
+
+            # Unsealed segment — scan it line by line
+            path = os.path.join(self.directory, name)
+            scanned, end = _scan_segment(path)
+            entries = []
+            for offset, entry in scanned:
+                self._index(entry, (name, offset))
+                entries.append(
+                    [offset, entry["timestamp"], entry.get("rule_hash"), entry.get("output_variable")]
+                )
+            if not is_own:
+                continue
+            if number == active:
+                # Safe: the flock guarantees no other process appends here
+                os.truncate(path, end)
+                self._segment_entries = entries
+            else:
+                self._seal(name, entries)
+        return active
+
+    # ── Querying ──
+
+    def query(self, rule_hash=None, output_variable=None, since=None, until=None, limit=None):
+        """
+        Return logged entries matching every given filter, oldest first.
+        Starts from the smallest matching index bucket (rule hash, output,
+        or the bisected time range) and filters it by the others.
+        Entries still queued are written first so results are complete.
+        """
+        self.flush()
+        with self._lock:
+            buckets = []
+            if rule_hash is not None:
+                buckets.append(self._by_rule_hash.get(rule_hash, []))
+            if output_variable is not None:
+                buckets.append(self._by_output.get(output_variable, []))
+
+            if not buckets:
+                lo = 0 if since is None else bisect.bisect_left(self._times, since)
+                hi = len(self._times) if until is None else bisect.bisect_right(self._times, until)
+                candidates = self._locations[lo:hi]
+            else:
+                base = min(buckets, key=len)
+                others = [set(bucket) for bucket in buckets if bucket is not base]
+                candidates = []
+                for location in base:
+                    timestamp = self._timestamp_of[location]
+                    if since is not None and timestamp < since:
+                        continue
+                    if until is not None and timestamp > until:
+                        continue
+                    if all(location in other for other in others):
+                        candidates.append(location)
+                candidates.sort(key=self._timestamp_of.get)
+
+        if limit is not None:
+            candidates = candidates[:limit]
+        return [self._read(location) for location in candidates]
+
+    def _read(self, location):
+        segment, offset = location
+        with open(os.path.join(self.directory, segment), "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+
+# ── Default log shared by the pipeline ──
+RULE_HASH = compute_hash(CONFIG_PATH) if os.path.exists(CONFIG_PATH) else None
+
+_default_log = None
+_default_lock = threading.Lock()
+
+
+def get_audit_log():
+    """Return the process-wide audit log, opening it on first use."""
+    global _default_log
+    with _default_lock:
+        if _default_log is None:
+            _default_log = AuditLog()
+            atexit.register(_default_log.close)
+        return _default_log
+
+
+def record_verdict(expression, output_variable, risk_level, reason, status=None, attempts=None, source="validate"):
+    """Queue one verdict on the default audit log. Never blocks on disk I/O."""
+    get_audit_log().record({
+        "source": source,
+        "expression": expression,
+        "output_variable": output_variable,
+        "rule_hash": RULE_HASH,
+        "status": status,
+        "risk_level": risk_level,
+        "reason": reason,
+        "attempts": attempts or [],
+    })
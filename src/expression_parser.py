@@ -0,0 +1,131 @@
+import re
+
+# ── Structured Text boolean tokens ──
+TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|([A-Za-z_]\w*))')
+
+KEYWORDS = {"AND", "OR", "XOR", "NOT", "TRUE", "FALSE"}
+
+
+def tokenize(expression):
+    """
+    Split a Structured Text boolean expression into tokens.
+    Keywords are upper-cased, signal names are kept as written.
+    Raises ValueError on any character outside the boolean subset.
+    """
+    tokens = []
+    pos = 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = TOKEN_PATTERN.match(expression, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Unexpected character in expression at position {pos}: '{expression[pos:pos + 10]}'")
+        lparen, rparen, word = match.groups()
+        if lparen:
+            tokens.append("(")
+        elif rparen:
+            tokens.append(")")
+        elif word.upper() in KEYWORDS:
+            tokens.append(word.upper())
+        else:
+            tokens.append(word)
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent parser following IEC 61131-3 precedence:
+    NOT binds tightest, then AND, then XOR, then OR.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("Empty expression")
+        node = self.parse_binary("OR")
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected token '{self.peek()}'")
+        return node
+
+    def parse_binary(self, op):
+        lower = {"OR": "XOR", "XOR": "AND", "AND": None}[op]
+        parse_operand = (lambda: self.parse_binary(lower)) if lower else self.parse_unary
+        operands = [parse_operand()]
+        while self.peek() == op:
+            self.take()
+            operands.append(parse_operand())
+        if len(operands) == 1:
+            return operands[0]
+        return (op.lower(), operands)
+
+    def parse_unary(self):
+        token = self.take()
+        if token == "NOT":
+            return ("not", self.parse_unary())
+        if token == "(":
+            node = self.parse_binary("OR")
+            if self.take() != ")":
+                raise ValueError("Unbalanced parentheses")
+            return node
+        if token in ("TRUE", "FALSE"):
+            return ("const", token == "TRUE")
+        if token is None:
+            raise ValueError("Unexpected end of expression")
+        if token in KEYWORDS or token == ")":
+            raise ValueError(f"Expected signal name, got '{token}'")
+        return ("var", token)
+
+
+def parse_expression(expression):
+    """
+    Parse a boolean expression into a nested tuple tree:
+    ("var", name), ("const", bool), ("not", node),
+    ("and" | "or" | "xor", [nodes])
+    """
+    return _Parser(tokenize(expression)).parse()
+
+
+def variables(node):
+    """Return the set of signal names referenced by a parsed expression."""
+    kind = node[0]
+    if kind == "var":
+        return {node[1]}
+    if kind == "const":
+        return set()
+    if kind == "not":
+        return variables(node[1])
+    names = set()
+    for child in node[1]:
+        names |= variables(child)
+    return names
+
+
+def evaluate(node, env):
+    """Evaluate a parsed expression against a dict of signal -> bool."""
+    kind = node[0]
+    if kind == "var":
+        return bool(env[node[1]])
+    if kind == "const":
+        return node[1]
+    if kind == "not":
+        return not evaluate(node[1], env)
+    values = [evaluate(child, env) for child in node[1]]
+    if kind == "and":
+        return all(values)
+    if kind == "or":
+        return any(values)
+    result = False
+    for value in values:
+        result ^= value
+    return result
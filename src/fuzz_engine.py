@@ -0,0 +1,287 @@
+import argparse
+import csv
+import os
+import random
+import re
+import time
+from multiprocessing import Pool
+
+from expression_parser import parse_expression, variables
+from safelogic_engine import check_mandatory_signal, check_or_bypass
+
+ESTOP = "EmergencyStopButton"
+FUZZ_OUTPUT = "FuzzRun"
+
+OR_KEYWORD = re.compile(r'\bOR\b', re.IGNORECASE)
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fuzz_results.csv")
+
+
+# ── Expression generator ──
+
+def random_tree(rng, depth, signals):
+    """Random parsed expression tree over the given signals, at most `depth` operators deep."""
+    if depth == 0 or rng.random() < 0.25:
+        node = ("var", rng.choice(signals))
+        return ("not", node) if rng.random() < 0.4 else node
+    roll = rng.random()
+    if roll < 0.15:
+        return ("not", random_tree(rng, depth - 1, signals))
+    kind = "and" if roll < 0.55 else "or" if roll < 0.85 else "xor"
+    return (kind, [random_tree(rng, depth - 1, signals) for _ in range(rng.randint(2, 3))])
+
+
+# Structured Text keywords are case-insensitive
+KEYWORD_CASES = (str.upper, str.lower, str.capitalize)
+
+
+def to_text(node, parent=None, keyword=str.upper):
+    """
+    Render a parsed tree back to Structured Text, parenthesizing nested operators.
+    `keyword` spells each keyword (AND/OR/XOR/NOT/TRUE/FALSE) — upper case by default.
+    """
+    kind = node[0]
+    if kind == "var":
+        return node[1]
+    if kind == "const":
+        return keyword("TRUE" if node[1] else "FALSE")
+    if kind == "not":
+        return keyword("NOT") + " " + to_text(node[1], "not", keyword)
+    text = f" {keyword(kind.upper())} ".join(to_text(child, kind, keyword) for child in node[1])
+    return f"({text})" if parent is not None else text
+
+
+def generate_expression(rng, depth=3, n_vars=3):
+    """
+    Random well-formed expression over EmergencyStopButton and Input1..n_vars,
+    with the case of every keyword chosen at random.
+    """
+    signals = [ESTOP] + [f"Input{i}" for i in range(1, n_vars + 1)]
+    return to_text(random_tree(rng, depth, signals), keyword=lambda word: rng.choice(KEYWORD_CASES)(word))
+
+
+# ── Truth-table oracle ──
+
+def truth_table(node, names):
+    """
+    Evaluate a tree over all 2^n assignments at once. Each signal is a
+    2^n-bit integer column, so AND/OR/NOT are single big-int operations.
+    """
+    rows = 1 << len(names)
+    full = (1 << rows) - 1
+    columns = {}
+    for i, name in enumerate(names):
+        column = 0
+        for row in range(rows):
+            if (row >> i) & 1:
+                column |= 1 << row
+        columns[name] = column
+
+    def table(n):
+        kind = n[0]
+        if kind == "var":
+            return columns[n[1]]
+        if kind == "const":
+            return full if n[1] else 0
+        if kind == "not":
+            return full ^ table(n[1])
+        result = table(n[1][0])
+        for child in n[1][1:]:
+            if kind == "and":
+                result &= table(child)
+            elif kind == "or":
+                result |= table(child)
+            else:
+                result ^= table(child)
+        return result
+
+    return table(node), columns
+
+
+def oracle(node):
+    """
+    Ground truth by exhaustive truth table:
+    - estop_cuts: output is FALSE in every scan where the estop is pressed
+    - satisfiable: output can be energized at all
+    The expression is SAFE exactly when both hold.
+    """
+    names = sorted(variables(node) | {ESTOP})
+    output, columns = truth_table(node, names)
+    estop_cuts = (output & columns[ESTOP]) == 0
+    return {"estop_cuts": estop_cuts, "satisfiable": output != 0, "safe": estop_cuts and output != 0}
+
+
+# ── Differential check ──
+
+def discrepancies(expression):
+    """Return the list of checks whose verdict disagrees with the oracle for this expression."""
+    truth = oracle(parse_expression(expression))
+    found = []
+
+    engine_safe = check_mandatory_signal(expression, FUZZ_OUTPUT)["status"] == "SAFE"
+    if engine_safe != truth["safe"]:
+        found.append("check_mandatory_signal:" + ("false_safe" if engine_safe else "false_violation"))
+
+    if OR_KEYWORD.search(expression):
+        bypass_reported = check_or_bypass(expression) is not None
+        if bypass_reported == truth["estop_cuts"]:
+            found.append("check_or_bypass:" + ("false_violation" if bypass_reported else "missed_bypass"))
+
+    return found
+
+
+def _shrink_candidates(node):
+    """Smaller trees derived from node: children, dropped operands, removed NOTs."""
+    kind = node[0]
+    if kind == "not":
+        yield node[1]
+        for smaller in _shrink_candidates(node[1]):
+            yield ("not", smaller)
+    elif kind in ("and", "or", "xor"):
+        children = node[1]
+        yield from children
+        if len(children) > 2:
+            for i in range(len(children)):
+                yield (kind, children[:i] + children[i + 1:])
+        for i, child in enumerate(children):
+            for smaller in _shrink_candidates(child):
+                yield (kind, children[:i] + [smaller] + children[i + 1:])
+
+
+def minimize(expression, kind):
+    """
+    Greedily shrink an expression while it still shows the same discrepancy.
+    Candidates are rendered in one keyword case (upper, lower or capitalized)
+    that reproduces the discrepancy; if mixed case is needed to reproduce it,
+    the expression is returned unchanged.
+    """
+    node = parse_expression(expression)
+    for keyword in KEYWORD_CASES:
+        if kind in discrepancies(to_text(node, keyword=keyword)):
+            break
+    else:
+        return expression
+
+    improved = True
+    while improved:
+        improved = False
+        for candidate in _shrink_candidates(node):
+            if kind in discrepancies(to_text(candidate, keyword=keyword)):
+                node = candidate
+                improved = True
+                break
+    return to_text(node, keyword=keyword)
+
+
+# ── Runner ──
+
+def _run_batch(args):
+    seed, cases, depth, n_vars = args
+    rng = random.Random(seed)
+    counts = {}
+    reproducers = {}
+    for _ in range(cases):
+        expression = generate_expression(rng, depth, n_vars)
+        for kind in discrepancies(expression):
+            counts[kind] = counts.get(kind, 0) + 1
+            if kind not in reproducers or len(expression) < len(reproducers[kind]):
+                reproducers[kind] = expression
+    return counts, reproducers
+
+
+def run_fuzz(cases=100_000, depth=3, n_vars=3, seed=0, workers=1, batch_size=10_000):
+    """
+    Generate `cases` random expressions, compare both checks against the
+    oracle and return discrepancy counts, minimized reproducers and throughput.
+    """
+    batches = []
+    remaining = cases
+    batch_seed = seed
+    while remaining > 0:
+        batches.append((batch_seed, min(batch_size, remaining), depth, n_vars))
+        remaining -= batch_size
+        batch_seed += 1
+
+    start = time.time()
+    if workers > 1:
+        with Pool(workers) as pool:
+            results = pool.map(_run_batch, batches)
+    else:
+        results = [_run_batch(batch) for batch in batches]
+    elapsed = time.time() - start
+
+    counts = {}
+    reproducers = {}
+    for batch_counts, batch_reproducers in results:
+        for kind, count in batch_counts.items():
+            counts[kind] = counts.get(kind, 0) + count
+        for kind, expression in batch_reproducers.items():
+            if kind not in reproducers or len(expression) < len(reproducers[kind]):
+                reproducers[kind] = expression
+
+    return {
+        "cases": cases,
+        "depth": depth,
+        "n_vars": n_vars,
+        "seed": seed,
+        "workers": workers,
+        "seconds": elapsed,
+        "cases_per_second": cases / elapsed if elapsed else 0.0,
+        "discrepancies": counts,
+        "reproducers": {kind: minimize(expression, kind) for kind, expression in reproducers.items()},
+    }
+
+
+def record_throughput(summary, path=RESULTS_PATH):
+    """Append one throughput row per fuzz run to fuzz_results.csv."""
+    new_file = not os.path.exists(path)
+    with open(path, mode="a", newline="") as file:
+        writer = csv.writer(file)
+        if new_file:
+            writer.writerow([
+                "Timestamp", "Cases", "Depth", "Vars", "Seed", "Workers",
+                "Seconds", "Cases_Per_Second", "Discrepancies"
+            ])
+        writer.writerow([
+            time.strftime("%Y-%m-%d %H:%M:%S"),
+            summary["cases"],
+            summary["depth"],
+            summary["n_vars"],
+            summary["seed"],
+            summary["workers"],
+            f"{summary['seconds']:.3f}",
+            f"{summary['cases_per_second']:.0f}",
+            sum(summary["discrepancies"].values())
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential fuzzing of the SafeLogic engine")
+    parser.add_argument("--cases", type=int, default=100_000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--vars", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    summary = run_fuzz(args.cases, args.depth, args.vars, args.seed, args.workers)
+    record_throughput(summary)
+
+    print("\n==============================")
+    print("SAFELOGIC DIFFERENTIAL FUZZ REPORT")
+    print("==============================\n")
+    print(f"Cases: {summary['cases']} (depth {summary['depth']}, {summary['n_vars']} inputs, seed {summary['seed']})")
+    print(f"Throughput: {summary['cases_per_second']:.0f} cases/s on {summary['workers']} worker(s)")
+
+    if not summary["discrepancies"]:
+        print("\nNo discrepancies against the truth-table oracle.")
+        return
+
+    print("\nDiscrepancies:")
+    for kind, count in sorted(summary["discrepancies"].items()):
+        print(f"  {kind}: {count}")
+        print(f"    minimized reproducer: {summary['reproducers'][kind]}")
+
+
+if __name__ == "__main__":
+    main()
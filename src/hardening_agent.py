@@ -1,11 +1,67 @@
 import re
-from llm_interface import LLMInterface
+from audit_log import record_verdict
+from llm_router import LLMRouter
+from safelogic_engine import check_mandatory_signal
 
 MAX_ATTEMPTS = 3
 
-llm = LLMInterface()
-
-def generate_plc_code(user_input, violation_feedback=None):
+# ── Guided decoding ──
+# None     — free-form generation, validated after the fact
+# "regex"  — vLLM guided_regex: one well-formed assignment line
+# "grammar"— vLLM guided_grammar (Lark): one assignment with balanced parentheses
+# guided_regex / guided_grammar are vLLM extensions — other OpenAI-compatible
+# servers reject them with HTTP 400, so guided decoding is opt-in.
+GUIDED_DECODING = None
+
+# Signal names must contain a lower-case letter or digit after the first
+# character (StartButton, Sensor1), so the all-caps keywords AND/OR/XOR/NOT
+# and the TRUE/FALSE literals can never be taken for a signal
+# Written so every name has exactly one way to match, which keeps Python's
+# backtracking re linear for the local filter below.
+ST_IDENTIFIER = r"[A-Za-z_](?:[A-Z_]*[a-z0-9][A-Za-z0-9_]*)?"
+
+# Deepest parenthesis nesting the regex admits — regular expressions cannot
+# count, so nesting is unrolled to a fixed depth
+MAX_PAREN_DEPTH = 3
+
+
+def _st_expression_regex(depth):
+    """Operand/operator alternation with parentheses nested at most `depth` deep."""
+    if depth == 0:
+        operand = ST_IDENTIFIER
+    else:
+        operand = rf"(?:{ST_IDENTIFIER}|\({_st_expression_regex(depth - 1)}\))"
+    term = rf"(?:NOT )*{operand}"
+    return rf"{term}(?: (?:AND|OR|XOR) {term})*"
+
+
+ST_ASSIGNMENT_REGEX = (
+    r"[A-Za-z_][A-Za-z0-9_]*(?:Run|Output|Active|Enable) := "
+    + _st_expression_regex(MAX_PAREN_DEPTH)
+    + ";"
+)
+
+# Keywords outrank SIGNAL (priority -1) so an LALR lexer — the one outlines
+# uses for vLLM's guided_grammar — never reads the N of "NOT " as a signal.
+# OUTPUT carries the " := " so an input ending in Run lexes as a SIGNAL.
+ST_ASSIGNMENT_GRAMMAR = r"""
+?start: assignment
+assignment: OUTPUT expr ";"
+?expr: xor_expr (" OR " xor_expr)*
+?xor_expr: term (" XOR " term)*
+?term: factor (" AND " factor)*
+?factor: "NOT " factor | "(" expr ")" | SIGNAL
+OUTPUT: /[A-Za-z_][A-Za-z0-9_]*(Run|Output|Active|Enable) := /
+SIGNAL.-1: /[A-Za-z_]([A-Z_]*[a-z0-9][A-Za-z0-9_]*)?/
+"""
+
+# Local filter for backends that ignore guided_regex — first line that is a
+# complete constrained assignment
+_LOCAL_ASSIGNMENT = re.compile(r"^\s*(" + ST_ASSIGNMENT_REGEX + r")", re.MULTILINE)
+
+llm = LLMRouter()
+
+def generate_plc_code(user_input, violation_feedback=None, guided=None, tier=0):
     if violation_feedback:
         system_prompt = """You are a PLC Structured Text generator.
 You MUST output a single assignment line in this exact format:
@@ -35,7 +91,14 @@ Rules you must never break:
 Example of correct output:
 MotorRun := StartButton AND NOT EmergencyStopButton;"""
 
-    return llm._chat_completion(system_prompt, user_input)
+    if guided == "regex":
+        code = llm._chat_completion(system_prompt, user_input, tier=tier, guided_regex=ST_ASSIGNMENT_REGEX)
+        # Local filter for backends that ignore guided_regex — keep only the constrained line
+        match = _LOCAL_ASSIGNMENT.search(code)
+        return match.group(1) if match else code
+    if guided == "grammar":
+        return llm._chat_completion(system_prompt, user_input, tier=tier, guided_grammar=ST_ASSIGNMENT_GRAMMAR)
+    return llm._chat_completion(system_prompt, user_input, tier=tier)
 
 
 def extract_output_assignment(code):
@@ -77,30 +140,29 @@ def extract_output_assignment(code):
     return None, None
 
 
-def validate_logic(boolean_expr):
+def validate_logic(boolean_expr, output_var=None):
     if not boolean_expr:
         return "CRITICAL", "No valid output assignment found"
 
-    if boolean_expr.strip().upper() in ['TRUE', 'FALSE', '1', '0']:
-        return "CRITICAL", "Unsafe constant expression — output always on or always off"
-
-    if "EmergencyStopButton" not in boolean_expr:
-        return "CRITICAL", "EmergencyStopButton missing"
-
-    if "NOT EmergencyStopButton" not in boolean_expr:
-        return "CRITICAL", "EmergencyStopButton present but not correctly negated — estop enables instead of cuts"
-
-    return "LOW", "Valid safety logic"
+    result = check_mandatory_signal(boolean_expr, output_var)
+    if result["status"] == "SAFE":
+        return "LOW", result["reason"]
+    return result["risk_level"], result["reason"]
 
 
-def harden_logic(user_input, explain=False):
+def harden_logic(user_input, explain=False, guided=GUIDED_DECODING):
     iterations = []
     explanation = None
     violation_feedback = None
+    total_tokens = 0
 
     for attempt in range(1, MAX_ATTEMPTS + 1):
         print(f"\n🔄 Attempt {attempt}/{MAX_ATTEMPTS}")
-        plc_code = generate_plc_code(user_input, violation_feedback)
+        # Cheap tiers first; escalate to the large model once validation has failed
+        plc_code = generate_plc_code(user_input, violation_feedback, guided, tier=attempt - 1)
+        tokens = llm.last_usage.get("total_tokens", 0)
+        route = llm.last_route
+        total_tokens += tokens
         output_var, boolean_expr = extract_output_assignment(plc_code)
 
         if not boolean_expr:
@@ -110,18 +172,22 @@ def harden_logic(user_input, explain=False):
                 "boolean": None,
                 "risk": "CRITICAL",
                 "reason": reason,
-                "raw_code": plc_code
+                "raw_code": plc_code,
+                "tokens": tokens,
+                "route": route
             })
             violation_feedback = reason
             continue
 
-        risk, reason = validate_logic(boolean_expr)
+        risk, reason = validate_logic(boolean_expr, output_var)
         iterations.append({
             "attempt": attempt,
             "boolean": boolean_expr,
             "risk": risk,
             "reason": reason,
-            "raw_code": plc_code
+            "raw_code": plc_code,
+            "tokens": tokens,
+            "route": route
         })
 
         if risk == "LOW":
@@ -132,17 +198,24 @@ def harden_logic(user_input, explain=False):
                     f"Safety Check: EmergencyStopButton present and correctly negated.\n"
                     f"Final Status: SAFE"
                 )
+            record_verdict(boolean_expr, output_var, risk, reason,
+                           status="SAFE", attempts=iterations, source="harden_logic")
             return {
                 "iterations": iterations,
                 "final_status": "SAFE",
-                "explanation": explanation
+                "explanation": explanation,
+                "total_tokens": total_tokens
             }
 
         # Feed violation back to LLM for next attempt
         violation_feedback = f"{reason}. Expression was: {boolean_expr}"
 
+    last = iterations[-1]
+    record_verdict(last["boolean"], output_var, last["risk"], last["reason"],
+                   status="CRITICAL VIOLATION", attempts=iterations, source="harden_logic")
     return {
         "iterations": iterations,
         "final_status": "CRITICAL VIOLATION",
-        "explanation": "Unable to generate safe verifiable logic after 3 attempts — human review required."
+        "explanation": "Unable to generate safe verifiable logic after 3 attempts — human review required.",
+        "total_tokens": total_tokens
     }
@@ -1,22 +1,52 @@
 import requests
 import json
+import threading
 import time
 
 print("🔥 LLMInterface module loaded — REAL HTTP MODE ACTIVE")
 
+# Seconds to wait for the server to connect and answer before giving up
+REQUEST_TIMEOUT_SECONDS = 120
+
+
+class LLMResponseError(Exception):
+    """The server answered, but not with a usable chat completion."""
+
+
 class LLMInterface:
 
     def __init__(
         self,
         base_url="http://localhost:8000/v1",
         model="Qwen/Qwen2.5-7B-Instruct",
-        temperature=0.2
+        temperature=0.2,
+        timeout=REQUEST_TIMEOUT_SECONDS
     ):
         self.base_url = base_url
         self.model = model
         self.temperature = temperature
+        self.timeout = timeout
+        self._state = threading.local()
+
+    @property
+    def last_usage(self):
+        """Token usage of the last call made from this thread."""
+        return getattr(self._state, "usage", {})
+
+    def _chat_completion(self, system_prompt, user_prompt, guided_regex=None, guided_grammar=None):
+        """Return the completion text; its token usage is kept on last_usage."""
+        content, self._state.usage = self._chat_completion_with_usage(
+            system_prompt, user_prompt, guided_regex, guided_grammar
+        )
+        return content
 
-    def _chat_completion(self, system_prompt, user_prompt):
+    def _chat_completion_with_usage(self, system_prompt, user_prompt, guided_regex=None, guided_grammar=None):
+        """
+        POST a chat completion and return (content, usage). guided_regex /
+        guided_grammar are passed through as vLLM guided-decoding parameters
+        so the output is constrained at the token level.
+        Raises LLMResponseError when the body is not a valid chat completion.
+        """
 
         print("\n🚀 ENTERED _chat_completion()")
 
@@ -30,6 +60,10 @@ class LLMInterface:
             ],
             "temperature": self.temperature
         }
+        if guided_regex:
+            payload["guided_regex"] = guided_regex
+        if guided_grammar:
+            payload["guided_grammar"] = guided_grammar
 
         print("\n========== LLM REQUEST ==========")
         print("POST:", url)
@@ -39,7 +73,7 @@ class LLMInterface:
 
         start_time = time.time()
 
-        response = requests.post(url, json=payload)
+        response = requests.post(url, json=payload, timeout=self.timeout)
 
         duration = time.time() - start_time
 
@@ -52,15 +86,15 @@ class LLMInterface:
 
         response.raise_for_status()
 
-        result = response.json()
-
-        if "choices" not in result:
-            raise Exception("❌ Invalid LLM response format")
-
-        content = result["choices"][0]["message"]["content"]
+        try:
+            result = response.json()
+            content = result["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise LLMResponseError(f"❌ Invalid LLM response format: {e!r}") from e
+        usage = result.get("usage") or {}
 
         print("\n🧠 EXTRACTED LLM CONTENT:")
         print(content)
         print("=======================================")
 
-        return content
+        return content, usage
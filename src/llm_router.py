@@ -0,0 +1,223 @@
+import re
+import threading
+import time
+
+import requests
+
+from llm_interface import LLMInterface, LLMResponseError, REQUEST_TIMEOUT_SECONDS
+
+# ── Backends ──
+# Large model pool — used on escalation (after a symbolic validation failure)
+LARGE_ENDPOINTS = ["http://localhost:8000/v1"]
+LARGE_MODEL = "Qwen/Qwen2.5-7B-Instruct"
+
+# Optional small local model — first try for prompts no template covers
+LOCAL_ENDPOINTS = []
+LOCAL_MODEL = "Qwen/Qwen2.5-0.5B-Instruct"
+
+# Endpoint is skipped for this long after a transient failure, growing with
+# each consecutive failure up to the cap
+FAILURE_COOLDOWN_SECONDS = 30
+MAX_COOLDOWN_SECONDS = 300
+
+# ── Template fast path ──
+# Output device phrase -> output variable
+TEMPLATE_OUTPUTS = {
+    "motor": "MotorRun",
+    "conveyor": "ConveyorRun",
+    "pump": "PumpRun",
+    "fan": "FanRun",
+}
+
+# Condition phrase -> Structured Text literal
+TEMPLATE_CONDITIONS = {
+    "start button pressed": "StartButton",
+    "start button is pressed": "StartButton",
+    "start pressed": "StartButton",
+    "safety door closed": "NOT SafetyDoorOpen",
+    "safety door is closed": "NOT SafetyDoorOpen",
+    "door closed": "NOT SafetyDoorOpen",
+    "no overload": "NOT OverloadRelay",
+    "overload relay not active": "NOT OverloadRelay",
+    "hydraulic valve open": "HydraulicValveOpen",
+    "remote start pressed": "RemoteStart",
+}
+
+# Estop phrases — the estop cut is always appended, so these are just consumed
+ESTOP_PHRASES = re.compile(
+    r'^(emergency stop|e-?stop)( button)? (is )?not (active|pressed)$'
+)
+
+TEMPLATE_PATTERN = re.compile(
+    r'^\s*(?:the\s+)?(?P<output>\w+)\s+(?:runs|starts|should run)\s+(?:only\s+)?(?:when|if)\s+(?P<conditions>.+?)\s*\.?\s*$',
+    re.IGNORECASE
+)
+
+
+def template_generate(user_prompt):
+    """
+    Generate PLC code for common phrasings without any model call, e.g.
+    "motor runs when start button pressed and emergency stop not active".
+    Returns None unless every clause of the prompt is a known phrase.
+    """
+    match = TEMPLATE_PATTERN.match(user_prompt)
+    if not match:
+        return None
+    output = TEMPLATE_OUTPUTS.get(match.group("output").lower())
+    if not output:
+        return None
+
+    literals = []
+    for clause in re.split(r'\s+and\s+', match.group("conditions").lower()):
+        clause = clause.strip()
+        if ESTOP_PHRASES.match(clause):
+            continue
+        literal = TEMPLATE_CONDITIONS.get(clause)
+        if not literal:
+            return None
+        if literal not in literals:
+            literals.append(literal)
+
+    if not literals:
+        return None
+    return f"{output} := {' AND '.join(literals)} AND NOT EmergencyStopButton;"
+
+
+def is_transient(error):
+    """
+    Errors that say the endpoint itself is unavailable: connection failures,
+    timeouts and 5xx responses. A 4xx or a malformed response is a problem
+    with the request and would fail the same way on every endpoint.
+    """
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return False
+
+
+class Endpoint:
+    """One OpenAI-compatible backend with health and in-flight tracking."""
+
+    def __init__(self, base_url, model, timeout=REQUEST_TIMEOUT_SECONDS):
+        self.llm = LLMInterface(base_url=base_url, model=model, timeout=timeout)
+        self.in_flight = 0
+        self.failures = 0
+        self.unhealthy_until = 0.0
+
+    def healthy(self, now):
+        return now >= self.unhealthy_until
+
+
+class EndpointPool:
+    """
+    Balances requests across endpoints: the healthy endpoint with the fewest
+    in-flight requests wins. An endpoint that fails transiently is cooled
+    down and the request retried on the next candidate; any other error is
+    raised to the caller without touching the endpoint's health.
+    """
+
+    def __init__(self, base_urls, model, timeout=REQUEST_TIMEOUT_SECONDS):
+        self.endpoints = [Endpoint(url, model, timeout) for url in base_urls]
+        self._lock = threading.Lock()
+
+    def _acquire(self, tried):
+        with self._lock:
+            now = time.time()
+            candidates = [e for e in self.endpoints if e not in tried and e.healthy(now)]
+            if not candidates:
+                # Every endpoint is cooling down — try the one closest to recovery
+                candidates = [e for e in self.endpoints if e not in tried]
+                if not candidates:
+                    return None
+                candidates = [min(candidates, key=lambda e: e.unhealthy_until)]
+            endpoint = min(candidates, key=lambda e: e.in_flight)
+            endpoint.in_flight += 1
+            return endpoint
+
+    def _release(self, endpoint, ok=None):
+        """ok=True resets health, ok=False cools the endpoint down, None leaves it as is."""
+        with self._lock:
+            endpoint.in_flight -= 1
+            if ok:
+                endpoint.failures = 0
+                endpoint.unhealthy_until = 0.0
+            elif ok is False:
+                endpoint.failures += 1
+                cooldown = min(FAILURE_COOLDOWN_SECONDS * endpoint.failures, MAX_COOLDOWN_SECONDS)
+                endpoint.unhealthy_until = time.time() + cooldown
+
+    def complete(self, system_prompt, user_prompt, **guided):
+        """Run one chat completion. Returns (content, usage, base_url)."""
+        tried = []
+        last_error = None
+        while True:
+            endpoint = self._acquire(tried)
+            if endpoint is None:
+                raise RuntimeError(f"All LLM endpoints failed: {last_error}") from last_error
+            tried.append(endpoint)
+            try:
+                # Usage comes back with the content — the endpoint may be
+                # serving other requests at the same time
+                content, usage = endpoint.llm._chat_completion_with_usage(system_prompt, user_prompt, **guided)
+            except Exception as e:
+                if not is_transient(e):
+                    self._release(endpoint)
+                    raise
+                self._release(endpoint, ok=False)
+                last_error = e
+                continue
+            self._release(endpoint, ok=True)
+            return content, usage, endpoint.llm.base_url
+
+
+class LLMRouter:
+    """
+    Drop-in replacement for LLMInterface in the hardening loop.
+    tier 0 (first attempt): template fast path, then the small local model
+    tier 1+ (after a validation failure): the large model pool
+    Falls through to the large pool whenever a cheaper tier is unavailable.
+    """
+
+    def __init__(
+        self,
+        large_endpoints=LARGE_ENDPOINTS,
+        large_model=LARGE_MODEL,
+        local_endpoints=LOCAL_ENDPOINTS,
+        local_model=LOCAL_MODEL,
+        use_templates=True,
+        timeout=REQUEST_TIMEOUT_SECONDS
+    ):
+        self.large = EndpointPool(large_endpoints, large_model, timeout)
+        self.local = EndpointPool(local_endpoints, local_model, timeout) if local_endpoints else None
+        self.use_templates = use_templates
+        self._state = threading.local()
+
+    @property
+    def last_usage(self):
+        return getattr(self._state, "usage", {})
+
+    @property
+    def last_route(self):
+        return getattr(self._state, "route", None)
+
+    def _chat_completion(self, system_prompt, user_prompt, tier=0, **guided):
+        if tier == 0 and self.use_templates:
+            code = template_generate(user_prompt)
+            if code:
+                self._state.usage, self._state.route = {}, "template"
+                return code
+
+        if tier == 0 and self.local:
+            try:
+                content, usage, url = self.local.complete(system_prompt, user_prompt, **guided)
+                self._state.usage, self._state.route = usage, f"local:{url}"
+                return content
+            except (RuntimeError, requests.RequestException, LLMResponseError) as e:
+                # Local pool down, or the small model rejected the request or
+                # answered with something that is not a chat completion
+                print(f"⚠️  Local model unavailable, escalating: {e}")
+
+        content, usage, url = self.large.complete(system_prompt, user_prompt, **guided)
+        self._state.usage, self._state.route = usage, f"large:{url}"
+        return content
@@ -0,0 +1,243 @@
+import re
+from fnmatch import translate
+
+
+def signal_polarity(node, negated=False, positive=None, negative=None):
+    """
+    Collect the signals that appear with enabling (even number of NOTs)
+    and cutting (odd number of NOTs) polarity. XOR operands count as both.
+    Returns (positive_signals, negative_signals).
+    """
+    if positive is None:
+        positive, negative = set(), set()
+    kind = node[0]
+    if kind == "var":
+        (negative if negated else positive).add(node[1])
+    elif kind == "not":
+        signal_polarity(node[1], not negated, positive, negative)
+    elif kind == "xor":
+        for child in node[1]:
+            signal_polarity(child, False, positive, negative)
+            signal_polarity(child, True, positive, negative)
+    elif kind in ("and", "or"):
+        for child in node[1]:
+            signal_polarity(child, negated, positive, negative)
+    return positive, negative
+
+
+def cutting_signals(node, negated=False):
+    """
+    Signals that cut the output on every path: NOT x terms on the top-level
+    AND spine (NOT (a OR b) counts as NOT a AND NOT b). Signals negated only
+    inside an OR or XOR group are left out — another operand of the group
+    can energize the output while they are active.
+    """
+    kind = node[0]
+    if kind == "var":
+        return {node[1]} if negated else set()
+    if kind == "not":
+        return cutting_signals(node[1], not negated)
+    if (kind == "and" and not negated) or (kind == "or" and negated):
+        cut = set()
+        for child in node[1]:
+            cut |= cutting_signals(child, negated)
+        return cut
+    return set()
+
+
+class CompiledRules:
+    """
+    Rules from safety_rules.json compiled once into bitmask predicates.
+    Every signal named by any rule gets one bit; an expression is reduced to
+    two ints (enabling signals, signals that cut every path) and each rule is a couple of
+    integer mask tests, independent of how the rule was written.
+
+    Rules are bucketed by output scope (exact names, glob patterns, unscoped)
+    and by trigger signal in an inverted index, so only rules that can fire
+    for a given output and expression are evaluated.
+    """
+
+    def __init__(self, rules, signal_bits, aliases, scopes, triggers, mandatory_signals=()):
+        self.rules = rules
+        self.signal_bits = signal_bits
+        self.aliases = aliases
+        self.mandatory_signals = list(mandatory_signals)
+        self._alias_pattern = (
+            re.compile(r'\b(' + '|'.join(re.escape(a) for a in sorted(aliases, key=len, reverse=True)) + r')\b')
+            if aliases else None
+        )
+
+        # Output scope buckets
+        self.unscoped = set()
+        self.by_output = {}
+        self.output_patterns = []
+        for rule_id, patterns in enumerate(scopes):
+            if not patterns:
+                self.unscoped.add(rule_id)
+            for pattern in patterns:
+                if any(c in pattern for c in "*?["):
+                    self.output_patterns.append((re.compile(translate(pattern)), rule_id))
+                else:
+                    self.by_output.setdefault(pattern, set()).add(rule_id)
+        self._scope_cache = {}
+
+        # Signal -> rules inverted index; interlock rules fire on absence, so
+        # they are candidates whenever they are in scope (bucketed per output
+        # in _scope)
+        self.by_signal = {}
+        self.always = set()
+        for rule_id, trigger in enumerate(triggers):
+            if trigger is None:
+                self.always.add(rule_id)
+            else:
+                self.by_signal.setdefault(trigger, set()).add(rule_id)
+
+        # Unknown output: forbidden combinations are dangerous on any output,
+        # so they all apply; scoped interlock requirements do not
+        self._unknown_scope = self.unscoped | (set(range(len(rules))) - self.always)
+
+    def canonicalize(self, expression):
+        """Rewrite aliased signal names to their canonical name."""
+        if not self._alias_pattern:
+            return expression
+        return self._alias_pattern.sub(lambda m: self.aliases[m.group(1)], expression)
+
+    def _scope(self, output_variable):
+        """
+        (rule ids in scope, interlock rule ids in scope) for an output,
+        memoized per name so interlock rules are bucketed once per output.
+        """
+        if output_variable is None:
+            return self._unknown_scope, frozenset()
+        cached = self._scope_cache.get(output_variable)
+        if cached is None:
+            scoped = self.unscoped | self.by_output.get(output_variable, set())
+            scoped |= {rule_id for regex, rule_id in self.output_patterns if regex.match(output_variable)}
+            cached = (scoped, scoped & self.always)
+            self._scope_cache[output_variable] = cached
+        return cached
+
+    def rules_for_output(self, output_variable):
+        """Rule ids whose output scope covers this output (memoized per name)."""
+        return self._scope(output_variable)[0]
+
+    def rules_in_scope(self, output_variable):
+        """Compiled rules that apply to this output, in rule-file order."""
+        return [self.rules[rule_id] for rule_id in sorted(self.rules_for_output(output_variable))]
+
+    def candidate_rules(self, enabling_signals, output_variable=None):
+        """Rule ids that are in scope and can be triggered by these signals."""
+        scoped, interlocks = self._scope(output_variable)
+        triggered = set(interlocks)
+        for name in enabling_signals:
+            triggered |= self.by_signal.get(name, set()) & scoped
+        return sorted(triggered)
+
+    def evaluate(self, node, output_variable=None):
+        """Return the first violated rule for a parsed expression, or None."""
+        positive, _ = signal_polarity(node)
+        bits = self.signal_bits
+        pos = 0
+        for name in positive:
+            pos |= bits.get(name, 0)
+        neg = 0
+        for name in cutting_signals(node):
+            neg |= bits.get(name, 0)
+
+        for rule_id in self.candidate_rules(positive, output_variable):
+            rule = self.rules[rule_id]
+            if rule["violated"](pos, neg):
+                return rule
+        return None
+
+
+def _mask(signal_bits, signals):
+    mask = 0
+    for signal in signals:
+        mask |= signal_bits[signal]
+    return mask
+
+
+def _predicate(forbidden_active, required_interlocks):
+    """
+    Build one closure over (enabling_mask, cutting_mask). A rule is violated when
+    all forbidden_active signals enable the output, or when any required
+    interlock does not cut the output on every path.
+    """
+    def violated(pos, neg):
+        if forbidden_active and (pos & forbidden_active) == forbidden_active:
+            return True
+        return (neg & required_interlocks) != required_interlocks
+
+    return violated
+
+
+def compile_rules(rules):
+    """
+    Compile the rule document into a CompiledRules instance.
+    Supports the legacy forbidden_active_combinations pairs and the
+    conditional_rules schema (applies_to, forbidden_active,
+    required_interlocks) plus signal_aliases. mandatory_safety_signals with
+    must_be_negated are kept as canonical names for the engine's
+    presence and polarity checks.
+    """
+    aliases = dict(rules.get("signal_aliases", {}))
+
+    def canonical(name):
+        return aliases.get(name, name)
+
+    mandatory = []
+    for signal in rules.get("mandatory_safety_signals", []):
+        name = canonical(signal["signal"])
+        if signal.get("must_be_negated") and name not in mandatory:
+            mandatory.append(name)
+
+    # Legacy pairs: forbidden_with names the output variable the rule guards
+    specs = []
+    for rule in rules.get("forbidden_active_combinations", []):
+        specs.append({
+            "source": rule,
+            "applies_to": [rule["forbidden_with"]] if rule.get("forbidden_with") else [],
+            "forbidden_active": [canonical(rule["active_signal"])],
+            "required_interlocks": [],
+        })
+    for rule in rules.get("conditional_rules", []):
+        if not rule.get("forbidden_active") and not rule.get("required_interlocks"):
+            raise ValueError(f"Rule {rule.get('id')} has no forbidden_active or required_interlocks condition")
+        specs.append({
+            "source": rule,
+            "applies_to": rule.get("applies_to", []),
+            "forbidden_active": [canonical(s) for s in rule.get("forbidden_active", [])],
+            "required_interlocks": [canonical(s) for s in rule.get("required_interlocks", [])],
+        })
+
+    signal_bits = {}
+    for spec in specs:
+        for signal in spec["forbidden_active"] + spec["required_interlocks"]:
+            signal_bits.setdefault(signal, 1 << len(signal_bits))
+
+    compiled = []
+    for spec in specs:
+        source = spec["source"]
+        compiled.append({
+            "id": source.get("id"),
+            "name": source.get("name", source.get("id")),
+            "risk_level": source.get("risk_level", "HIGH"),
+            "real_world_consequence": source.get("real_world_consequence", ""),
+            "forbidden_active": spec["forbidden_active"],
+            "required_interlocks": spec["required_interlocks"],
+            "violated": _predicate(
+                _mask(signal_bits, spec["forbidden_active"]),
+                _mask(signal_bits, spec["required_interlocks"]),
+            ),
+        })
+
+    # Any one forbidden_active signal must enable the output for the rule to
+    # fire, so indexing each rule under its first signal is enough
+    scopes = [spec["applies_to"] for spec in specs]
+    triggers = [
+        None if spec["required_interlocks"] else spec["forbidden_active"][0]
+        for spec in specs
+    ]
+    return CompiledRules(compiled, signal_bits, aliases, scopes, triggers, mandatory)
+
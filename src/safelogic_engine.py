@@ -2,6 +2,9 @@ import re
 import json
 import os
 
+from expression_parser import parse_expression, variables
+from rule_compiler import compile_rules, cutting_signals, signal_polarity
+
 # ── Load rules from JSON ──
 CONFIG_PATH = os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
@@ -17,6 +20,12 @@ def load_rules():
         return {}
 
 RULES = load_rules()
+COMPILED_RULES = compile_rules(RULES)
+
+# The estop is always mandatory, even without a rule file
+MANDATORY_SIGNALS = ["EmergencyStopButton"] + [
+    s for s in COMPILED_RULES.mandatory_signals if s != "EmergencyStopButton"
+]
 
 
 def extract_expression(plc_code):
@@ -54,11 +63,58 @@ def normalize_expression(extracted):
     return extracted["expression"]
 
 
+_PARENS = re.compile(r'[()]')
+_SPLIT_PATTERNS = {
+    op: re.compile(r'[()]|\b' + op + r'\b', re.IGNORECASE) for op in ("OR", "AND")
+}
+
+
+def _strip_outer_parens(expression):
+    """Remove redundant parentheses wrapping the whole expression."""
+    expression = expression.strip()
+    while expression.startswith('(') and expression.endswith(')'):
+        depth = 0
+        for match in _PARENS.finditer(expression):
+            depth += 1 if match.group(0) == '(' else -1
+            if depth == 0:
+                break
+        if match.end() != len(expression):
+            break
+        expression = expression[1:-1].strip()
+    return expression
+
+
+def split_top_level(expression, operator):
+    """
+    Split an expression on an operator (OR / AND) outside any parentheses.
+    Redundant parentheses around the whole expression and around each part
+    are removed.
+    """
+    expression = _strip_outer_parens(expression)
+    parts = []
+    depth = 0
+    start = 0
+    for match in _SPLIT_PATTERNS[operator].finditer(expression):
+        token = match.group(0)
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0:
+            parts.append(_strip_outer_parens(expression[start:match.start()]))
+            start = match.end()
+    parts.append(_strip_outer_parens(expression[start:]))
+    return parts
+
+
 def check_or_bypass(expression):
     """
     Detect OR bypass attacks.
     Pattern: anything AND NOT EmergencyStopButton OR anything_else
     The OR creates an alternative path that bypasses estop.
+    Every top-level OR path must be ANDed with NOT EmergencyStopButton;
+    an OR nested inside such a path, e.g.
+    (StartButton OR RemoteStart) AND NOT EmergencyStopButton, is still cut.
     """
     # Normalize spacing
     expr = ' ' + expression.strip() + ' '
@@ -67,40 +123,48 @@ def check_or_bypass(expression):
     if ' OR ' not in expr.upper() and ' or ' not in expr:
         return None
 
-    # If OR exists, check if the part after OR could bypass estop
-    # Split on OR and check each segment
-    parts = re.split(r'\bOR\b', expression, flags=re.IGNORECASE)
-
-    if len(parts) > 1:
-        # Check if any OR segment doesn't include NOT EmergencyStopButton
-        for part in parts:
-            part = part.strip()
-            if 'EmergencyStopButton' not in part:
-                return {
-                    "status": "VIOLATION",
-                    "risk_level": "HIGH",
-                    "reason": f"OR bypass detected — '{part.strip()}' path can activate output without EmergencyStopButton check"
-                }
-            if 'NOT EmergencyStopButton' not in part and 'EmergencyStopButton' in part:
-                return {
-                    "status": "VIOLATION",
-                    "risk_level": "CRITICAL",
-                    "reason": f"OR bypass with unsafe estop polarity — estop check missing NOT in segment: '{part.strip()}'"
-                }
+    for part in split_top_level(expression, "OR"):
+        if 'EmergencyStopButton' not in part:
+            return {
+                "status": "VIOLATION",
+                "risk_level": "HIGH",
+                "reason": f"OR bypass detected — '{part}' path can activate output without EmergencyStopButton check"
+            }
+        if 'NOT EmergencyStopButton' not in part:
+            return {
+                "status": "VIOLATION",
+                "risk_level": "CRITICAL",
+                "reason": f"OR bypass with unsafe estop polarity — estop check missing NOT in segment: '{part}'"
+            }
+        conjuncts = [' '.join(c.split()) for c in split_top_level(part, "AND")]
+        if 'NOT EmergencyStopButton' not in conjuncts:
+            return {
+                "status": "VIOLATION",
+                "risk_level": "HIGH",
+                "reason": f"OR bypass detected — in '{part}' the estop sits inside an OR group, so another path can activate output without EmergencyStopButton check"
+            }
 
     return None
 
 
-def check_mandatory_signal(boolean_expression):
+def _signal_label(signal):
+    return "estop" if signal == "EmergencyStopButton" else signal
+
+
+def check_mandatory_signal(boolean_expression, output_variable=None):
     """
     Full safety validation pipeline.
+    output_variable (from extract_expression) selects the output-scoped rules;
+    when unknown, every forbidden combination is applied.
     Checks in order:
     1. None check
     2. Constant expression check
-    3. Mandatory signal presence
-    4. Polarity check
-    5. OR bypass detection
-    6. Forbidden combinations from JSON
+    3. Parse — signals are matched by exact name on the parse tree from here on
+    4. Mandatory signal presence
+    5. Polarity check
+    6. OR bypass detection
+    7. Mandatory signals cut every path (NOT term on the top-level AND chain)
+    8. Compiled rules from JSON (forbidden combinations, interlocks)
     """
     if boolean_expression is None:
         return {
@@ -109,6 +173,9 @@ def check_mandatory_signal(boolean_expression):
             "reason": "No output assignment detected"
         }
 
+    # Signal aliases resolve to canonical names before any check
+    boolean_expression = COMPILED_RULES.canonicalize(boolean_expression)
+
     # Constant expression check
     if boolean_expression.strip().upper() in ['TRUE', 'FALSE', '1', '0']:
         return {
@@ -117,40 +184,57 @@ def check_mandatory_signal(boolean_expression):
             "reason": "Unsafe constant expression — output always energized regardless of any input"
         }
 
-    # Mandatory signal presence
-    if "EmergencyStopButton" not in boolean_expression:
-        return {
-            "status": "VIOLATION",
-            "risk_level": "CRITICAL",
-            "reason": "EmergencyStopButton missing — estop has no effect on this output"
-        }
-
-    # Polarity check
-    if "NOT EmergencyStopButton" not in boolean_expression:
+    try:
+        parsed = parse_expression(boolean_expression)
+    except ValueError as e:
         return {
             "status": "VIOLATION",
             "risk_level": "CRITICAL",
-            "reason": "Incorrect emergency stop polarity — estop enables output instead of cutting it"
+            "reason": f"Expression could not be parsed — {e}"
         }
+    names = variables(parsed)
+    _, negated = signal_polarity(parsed)
+
+    for signal in MANDATORY_SIGNALS:
+        # Mandatory signal presence
+        if signal not in names:
+            return {
+                "status": "VIOLATION",
+                "risk_level": "CRITICAL",
+                "reason": f"{signal} missing — {_signal_label(signal)} has no effect on this output"
+            }
+
+        # Polarity check
+        if signal not in negated:
+            return {
+                "status": "VIOLATION",
+                "risk_level": "CRITICAL",
+                "reason": f"Incorrect {_signal_label(signal)} polarity — {signal} enables output instead of cutting it"
+            }
 
     # OR bypass detection
     or_result = check_or_bypass(boolean_expression)
     if or_result:
         return or_result
 
-    # Forbidden combinations from JSON rules
-    forbidden = RULES.get("forbidden_active_combinations", [])
-    for rule in forbidden:
-        active = rule.get("active_signal", "")
-        forbidden_with = rule.get("forbidden_with", "")
-        if active in boolean_expression and forbidden_with in boolean_expression:
-            # Check if active signal is used as enabling (not negated)
-            if f"NOT {active}" not in boolean_expression:
-                return {
-                    "status": "VIOLATION",
-                    "risk_level": rule.get("risk_level", "HIGH"),
-                    "reason": f"{rule['name']} ({rule['id']}) — {rule['real_world_consequence']}"
-                }
+    # Negated somewhere is not enough — e.g. inside an XOR the signal can also enable
+    cut = cutting_signals(parsed)
+    for signal in MANDATORY_SIGNALS:
+        if signal not in cut:
+            return {
+                "status": "VIOLATION",
+                "risk_level": "CRITICAL",
+                "reason": f"{signal} does not cut the output on every path — it must be a NOT term ANDed with the rest of the expression"
+            }
+
+    # Compiled rules from JSON — exact signal matching on the parsed expression
+    rule = COMPILED_RULES.evaluate(parsed, output_variable)
+    if rule:
+        return {
+            "status": "VIOLATION",
+            "risk_level": rule["risk_level"],
+            "reason": f"{rule['name']} ({rule['id']}) — {rule['real_world_consequence']}"
+        }
 
     return {
         "status": "SAFE",
@@ -1,5 +1,6 @@
 import streamlit as st
 import time
+from audit_log import record_verdict
 from hardening_agent import harden_logic
 from safelogic_engine import check_mandatory_signal, extract_expression, normalize_expression
 
@@ -51,6 +52,8 @@ if "Generate" in mode:
             total_time = time.time() - start_time
 
             st.success(f"⏱️ Total Safety Pipeline Time: {total_time:.3f} seconds")
+            if result.get("total_tokens"):
+                st.caption(f"LLM tokens used: {result['total_tokens']} across {len(result['iterations'])} attempt(s)")
             st.markdown("---")
 
             # Iteration Timeline
@@ -72,6 +75,8 @@ if "Generate" in mode:
                     st.markdown(f"- **Risk Level:** :orange[{risk}]")
 
                 st.markdown(f"- **Reason:** {attempt['reason']}")
+                if attempt.get("route"):
+                    st.markdown(f"- **Generated By:** `{attempt['route']}`")
                 st.markdown("---")
 
             # Final Status
@@ -123,15 +128,25 @@ else:
             start_time = time.time()
 
             # Direct symbolic validation — no LLM
+            # A full assignment (MotorRun := ...;) also scopes output-specific rules
             expression = expression_input.strip()
-            result = check_mandatory_signal(expression)
+            output_variable = None
+            extracted = extract_expression(expression) if ":=" in expression else None
+            if extracted:
+                output_variable = extracted["output_variable"]
+                expression = normalize_expression(extracted)
+            result = check_mandatory_signal(expression, output_variable)
             elapsed = time.time() - start_time
+            record_verdict(expression, output_variable, result.get("risk_level"), result.get("reason"),
+                           status=result.get("status"))
 
             st.success(f"⚡ Validation Time: {elapsed:.4f} seconds (deterministic — no LLM)")
             st.markdown("---")
 
             st.header("📋 Validation Report")
             st.markdown(f"**Expression Evaluated:** `{expression}`")
+            if output_variable:
+                st.markdown(f"**Output Variable:** `{output_variable}`")
 
             risk = result.get("risk_level", "UNKNOWN")
             status = result.get("status", "UNKNOWN")
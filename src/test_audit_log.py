@@ -0,0 +1,147 @@
+import os
+import tempfile
+
+from audit_log import AuditLog
+
+
+def run_test(name, check):
+    print("\n==============================")
+    print(f"TEST: {name}")
+    print("==============================")
+
+    for label, value in check().items():
+        print(f"{label}:", value)
+
+
+def fill(log, count):
+    for i in range(count):
+        log.record({
+            "expression": f"Input{i} AND NOT EmergencyStopButton",
+            "output_variable": "MotorRun" if i % 2 else "PumpRun",
+            "rule_hash": f"hash-{i % 3}",
+            "risk_level": "LOW",
+            "timestamp": 1000.0 + i,
+        })
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".jsonl"))
+
+
+def query_by_index():
+    log = AuditLog(tempfile.mkdtemp())
+    fill(log, 30)
+    both = log.query(rule_hash="hash-1", output_variable="MotorRun")
+    result = {
+        "By Rule Hash (expect 10)": len(log.query(rule_hash="hash-1")),
+        "By Output (expect 15)": len(log.query(output_variable="PumpRun")),
+        "By Rule Hash + Output (expect 5)": len(both),
+        "Since Timestamp (expect 17)": len(log.query(since=1013.0)),
+        "Time Range (expect 5)": len(log.query(since=1010.0, until=1014.0)),
+        "Limit (expect 4)": len(log.query(output_variable="MotorRun", limit=4)),
+        "Oldest First": log.query(limit=1)[0]["expression"],
+    }
+    log.close()
+    return result
+
+
+def segment_rotation():
+    directory = tempfile.mkdtemp()
+    log = AuditLog(directory, segment_max_bytes=1000)
+    fill(log, 40)
+    result = {
+        "Entries (expect 40)": len(log.query()),
+        "Segments": len(segment_files(directory)),
+        "Sealed Sidecars": len([n for n in os.listdir(directory) if n.endswith(".idx.json")]),
+    }
+    log.close()
+    return result
+
+
+def reopen():
+    directory = tempfile.mkdtemp()
+    log = AuditLog(directory, segment_max_bytes=1000)
+    fill(log, 40)
+    log.close()
+
+    # Sealed segments load from sidecars, the active one is rescanned
+    log = AuditLog(directory, segment_max_bytes=1000)
+    log.record({"expression": "Extra AND NOT EmergencyStopButton", "output_variable": "FanRun"})
+    result = {
+        "Entries After Reopen (expect 41)": len(log.query()),
+        "By Rule Hash (expect 13)": len(log.query(rule_hash="hash-1")),
+        "New Entry": log.query(output_variable="FanRun")[0]["expression"],
+    }
+    log.close()
+    return result
+
+
+def torn_final_line():
+    directory = tempfile.mkdtemp()
+    log = AuditLog(directory)
+    fill(log, 5)
+    log.close()
+
+    # Simulate a crash part-way through the last write
+    with open(os.path.join(directory, segment_files(directory)[-1]), "ab") as f:
+        f.write(b'{"expression": "torn')
+
+    log = AuditLog(directory)
+    log.record({"expression": "After Crash", "output_variable": "FanRun"})
+    result = {
+        "Entries (expect 6)": len(log.query()),
+        "Entry After Torn Line": log.query(output_variable="FanRun")[0]["expression"],
+    }
+    log.close()
+    return result
+
+
+def rejected_entry():
+    directory = tempfile.mkdtemp()
+    log = AuditLog(directory)
+    log.record({"bad": {1, 2}})
+    log.record({"expression": "Good", "output_variable": "FanRun"})
+    result = {
+        "Good Entry Written (expect 1)": len(log.query(output_variable="FanRun")),
+        "Rejected Log": [n for n in os.listdir(directory) if n.startswith("rejected-")],
+    }
+    log.close()
+    return result
+
+
+def two_writers():
+    directory = tempfile.mkdtemp()
+    first = AuditLog(directory)
+    second = AuditLog(directory)
+    fill(first, 3)
+    fill(second, 2)
+    first.close()
+    second.close()
+    log = AuditLog(directory)
+    result = {
+        "Segments": segment_files(directory),
+        "Entries (expect 5)": len(log.query()),
+    }
+    log.close()
+    return result
+
+
+if __name__ == "__main__":
+
+    # 1️⃣ Record and query by each index
+    run_test("Query By Index", query_by_index)
+
+    # 2️⃣ Segment rotation
+    run_test("Segment Rotation", segment_rotation)
+
+    # 3️⃣ Reopen — sidecars plus rescan of the active segment
+    run_test("Reopen", reopen)
+
+    # 4️⃣ Torn final line is dropped, appending continues cleanly
+    run_test("Torn Final Line", torn_final_line)
+
+    # 5️⃣ Unserializable entry is rejected without stopping the writer
+    run_test("Rejected Entry", rejected_entry)
+
+    # 6️⃣ Concurrent writers get separate segment prefixes
+    run_test("Two Writers", two_writers)
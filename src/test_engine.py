@@ -1,4 +1,4 @@
-from safelogic_engine import check_safety
+from safelogic_engine import check_mandatory_signal
 
 def run_test(name, expression):
     print("\n==============================")
@@ -6,16 +6,20 @@ def run_test(name, expression):
     print("==============================")
     print("Expression:", expression)
 
-    result = check_safety(expression)
+    result = check_mandatory_signal(expression)
 
     print("Status:", result.get("status"))
     print("Risk Level:", result.get("risk_level"))
     print("Reason:", result.get("reason"))
-    print("Counterexample:", result.get("counterexample_explanation"))
 
 
 if __name__ == "__main__":
 
+    # Known engine gap (found by fuzz_engine.py): the OR bypass check still
+    # matches the estop text with an upper-case NOT, although Structured Text
+    # keywords are case-insensitive. The lower-case "Safe Case" below
+    # therefore currently prints VIOLATION.
+
     # 1️⃣ Safe Case
     run_test(
         "Safe Case",
@@ -0,0 +1,33 @@
+from fuzz_engine import discrepancies, run_fuzz
+
+
+def run_test(name, expression):
+    print("\n==============================")
+    print(f"TEST: {name}")
+    print("==============================")
+    print("Expression:", expression)
+    print("Discrepancies:", discrepancies(expression) or "none")
+
+
+if __name__ == "__main__":
+
+    # 1️⃣ Engine and oracle agree — estop cuts the output
+    run_test(
+        "Agreeing Safe Case",
+        "StartButton AND NOT EmergencyStopButton"
+    )
+
+    # 2️⃣ Estop negated by De Morgan — oracle SAFE, text polarity check rejects it
+    run_test(
+        "De Morgan Estop",
+        "StartButton AND NOT (Input1 OR EmergencyStopButton)"
+    )
+
+    # 3️⃣ Small differential run
+    summary = run_fuzz(cases=2000, depth=3, n_vars=3, seed=1)
+    print("\n==============================")
+    print("TEST: Fuzz Run")
+    print("==============================")
+    print("Cases/s:", round(summary["cases_per_second"]))
+    for kind, count in sorted(summary["discrepancies"].items()):
+        print(f"{kind}: {count} — {summary['reproducers'][kind]}")
@@ -0,0 +1,171 @@
+import random
+import re
+import time
+
+import hardening_agent
+from expression_parser import parse_expression
+from fuzz_engine import generate_expression, to_text
+from hardening_agent import ST_ASSIGNMENT_GRAMMAR, ST_ASSIGNMENT_REGEX, _LOCAL_ASSIGNMENT, generate_plc_code
+
+ASSIGNMENT = re.compile(ST_ASSIGNMENT_REGEX)
+
+ACCEPTED = [
+    "MotorRun := StartButton AND NOT EmergencyStopButton;",
+    "PumpRun := Sensor1 AND NOT EmergencyStopButton;",
+    "ConveyorRun := (StartButton OR RemoteStart) AND NOT EmergencyStopButton;",
+    "FanEnable := (A XOR B) AND NOT (NOT (C OR D) AND E);",
+    "ValveOutput := NOT NOT X;",
+]
+
+REJECTED = [
+    "MotorRun := StartButton AND AND NOT EmergencyStopButton;",
+    "MotorRun := StartButton AND NOT EmergencyStopButton",
+    "MotorRun := (StartButton AND NOT EmergencyStopButton;",
+    "MotorRun := StartButton NOT EmergencyStopButton;",
+    "MotorRun := TRUE;",
+    "Motor := StartButton AND NOT EmergencyStopButton;",
+    # Deeper than MAX_PAREN_DEPTH — kept last, the grammar accepts it
+    "MotorRun := ((((A)))) AND NOT EmergencyStopButton;",
+]
+
+
+def run_test(name, check):
+    print("\n==============================")
+    print(f"TEST: {name}")
+    print("==============================")
+
+    for label, value in check().items():
+        print(f"{label}:", value)
+
+
+class StubRouter:
+    """Stands in for LLMRouter: returns canned text and records the guided parameters."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.guided = None
+
+    def _chat_completion(self, system_prompt, user_prompt, tier=0, **guided):
+        self.guided = guided
+        return self.reply
+
+
+def parses(line):
+    try:
+        parse_expression(line.split(":=", 1)[1].rstrip(";"))
+        return True
+    except ValueError:
+        return False
+
+
+def regex_lines():
+    return {
+        "Accepted Lines Match": [bool(ASSIGNMENT.fullmatch(line)) for line in ACCEPTED],
+        "Accepted Lines Parse": [parses(line) for line in ACCEPTED],
+        "Rejected Lines Match (expect all False)": [bool(ASSIGNMENT.fullmatch(line)) for line in REJECTED],
+    }
+
+
+def fuzz_round_trip():
+    # Fuzzer expressions use mixed-case keywords; the constrained form is upper case
+    rng = random.Random(0)
+    matched = 0
+    same_tree = 0
+    for _ in range(2000):
+        tree = parse_expression(generate_expression(rng))
+        line = f"FuzzRun := {to_text(tree)};"
+        if ASSIGNMENT.fullmatch(line):
+            matched += 1
+            same_tree += parse_expression(line[len("FuzzRun := "):-1]) == tree
+    return {
+        "Matched (expect 2000)": matched,
+        "Same Tree After Parse (expect 2000)": same_tree,
+    }
+
+
+def local_filter_linear():
+    # Long near-miss lines must fail fast, not backtrack exponentially
+    lines = [
+        "MotorRun := " + "StartButton AND " * 2000 + "!",
+        "MotorRun := " + "(" * 3 + "A AND " * 2000 + ";",
+        "MotorRun := " + "ABCDEFGHIJ" * 2000 + ";",
+    ]
+    start = time.time()
+    found = [_LOCAL_ASSIGNMENT.search(line) is not None for line in lines]
+    return {
+        "Matched (expect all False)": found,
+        "Under 1 Second": time.time() - start < 1.0,
+    }
+
+
+def guided_generation():
+    noisy = (
+        "Sure! Here is the code:\n"
+        "```\n"
+        "MotorRun := StartButton AND AND NOT EmergencyStopButton;\n"
+        "MotorRun := StartButton AND NOT EmergencyStopButton; // estop cuts the motor\n"
+        "```\n"
+        "This keeps the motor off while the estop is pressed."
+    )
+    stub = StubRouter(noisy)
+    original = hardening_agent.llm
+    hardening_agent.llm = stub
+    try:
+        code = generate_plc_code("motor runs when start pressed", guided="regex")
+        regex_sent = stub.guided.get("guided_regex") == ST_ASSIGNMENT_REGEX
+
+        stub.reply = "I cannot produce that."
+        unmatched = generate_plc_code("motor runs when start pressed", guided="regex")
+
+        generate_plc_code("motor runs when start pressed", guided="grammar")
+        grammar_sent = stub.guided.get("guided_grammar") == ST_ASSIGNMENT_GRAMMAR
+    finally:
+        hardening_agent.llm = original
+    return {
+        "Extracted Code": code,
+        "guided_regex Sent": regex_sent,
+        "No Assignment Returned As Is": unmatched,
+        "guided_grammar Sent": grammar_sent,
+    }
+
+
+def grammar_lalr():
+    try:
+        from lark import Lark
+    except ImportError:
+        return {"Skipped": "lark not installed"}
+
+    # outlines compiles vLLM's guided_grammar with the LALR parser
+    parser = Lark(ST_ASSIGNMENT_GRAMMAR, parser="lalr")
+
+    def accepts(line):
+        try:
+            parser.parse(line)
+            return True
+        except Exception:
+            return False
+
+    return {
+        "Accepted Lines": [accepts(line) for line in ACCEPTED],
+        "Input Ending In Run": accepts("MotorRun := ConveyorRun AND NOT EmergencyStopButton;"),
+        "Rejected Lines (expect all False)": [accepts(line) for line in REJECTED[:-1]],
+        "Deep Nesting (no depth limit in a grammar)": accepts(REJECTED[-1]),
+    }
+
+
+if __name__ == "__main__":
+
+    # 1️⃣ Structured regex — accepted lines parse, malformed lines rejected
+    run_test("Regex Accepted And Rejected Lines", regex_lines)
+
+    # 2️⃣ Fuzzer expressions round-trip through the regex and the parser
+    run_test("Fuzz Round Trip", fuzz_round_trip)
+
+    # 3️⃣ Local filter stays linear on long near-miss lines
+    run_test("Local Filter Linear Time", local_filter_linear)
+
+    # 4️⃣ generate_plc_code against a stub backend that returns noisy text
+    run_test("Guided Generation", guided_generation)
+
+    # 5️⃣ Lark grammar under LALR (skipped without lark)
+    run_test("Grammar Under LALR", grammar_lalr)
@@ -0,0 +1,240 @@
+import json
+import threading
+import time
+
+import requests
+
+import llm_interface
+from llm_interface import LLMInterface, LLMResponseError
+from llm_router import MAX_COOLDOWN_SECONDS, EndpointPool, LLMRouter, template_generate
+
+
+def run_test(name, check):
+    print("\n==============================")
+    print(f"TEST: {name}")
+    print("==============================")
+
+    for label, value in check().items():
+        print(f"{label}:", value)
+
+
+class FakeLLM:
+    """Stands in for LLMInterface: answers, or raises the given error."""
+
+    def __init__(self, base_url, error=None, release=None):
+        self.base_url = base_url
+        self.error = error
+        self.release = release
+        self.calls = 0
+
+    def _chat_completion_with_usage(self, system_prompt, user_prompt, **guided):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait()
+        if self.error is not None:
+            raise self.error
+        # Usage differs per prompt so swapped accounting would show
+        usage = {"total_tokens": len(user_prompt)}
+        return f"MotorRun := StartButton AND NOT EmergencyStopButton; (from {self.base_url})", usage
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def fake_pool(*llms):
+    pool = EndpointPool([llm.base_url for llm in llms], "fake-model")
+    for endpoint, llm in zip(pool.endpoints, llms):
+        endpoint.llm = llm
+    return pool
+
+
+def template_hits_and_misses():
+    return {
+        "Start + Estop": template_generate("motor runs when start button pressed and emergency stop not active"),
+        "Door + Overload": template_generate("The pump should run only if safety door is closed and no overload."),
+        "Estop Active (expect None)": template_generate("motor runs if emergency stop active"),
+        "Unknown Condition (expect None)": template_generate("motor runs when temperature is low"),
+        "Unknown Output (expect None)": template_generate("heater runs when start button pressed"),
+    }
+
+
+def least_in_flight():
+    # Hold one request on endpoint A, the next request must go to B
+    release = threading.Event()
+    busy = FakeLLM("http://a", release=release)
+    idle = FakeLLM("http://b")
+    pool = fake_pool(busy, idle)
+
+    holder = threading.Thread(target=pool.complete, args=("system", "user"))
+    holder.start()
+    while not busy.calls:
+        time.sleep(0.001)
+    _, _, url = pool.complete("system", "user")
+    release.set()
+    holder.join()
+    return {
+        "Second Request Went To (expect http://b)": url,
+        "In Flight After (expect [0, 0])": [e.in_flight for e in pool.endpoints],
+    }
+
+
+def failover():
+    down = FakeLLM("http://down", error=requests.ConnectionError("refused"))
+    up = FakeLLM("http://up")
+    pool = fake_pool(down, up)
+    _, usage, url = pool.complete("system", "user")
+    return {
+        "Answered By (expect http://up)": url,
+        "Usage": usage,
+        "Down Endpoint Cooling (expect True)": not pool.endpoints[0].healthy(time.time()),
+        "Down Endpoint Failures (expect 1)": pool.endpoints[0].failures,
+    }
+
+
+def no_cooldown_on_4xx():
+    bad_request = FakeLLM("http://a", error=http_error(400))
+    other = FakeLLM("http://b")
+    pool = fake_pool(bad_request, other)
+    try:
+        pool.complete("system", "user")
+        raised = None
+    except requests.HTTPError as e:
+        raised = str(e)
+    return {
+        "Raised": raised,
+        "Retried Elsewhere (expect 0)": other.calls,
+        "Failures (expect 0)": pool.endpoints[0].failures,
+        "Cooling Down (expect False)": pool.endpoints[0].unhealthy_until > 0,
+    }
+
+
+def capped_backoff():
+    pool = fake_pool(FakeLLM("http://flaky", error=http_error(503)))
+    for _ in range(50):
+        try:
+            pool.complete("system", "user")
+        except RuntimeError:
+            pass
+    endpoint = pool.endpoints[0]
+    return {
+        "Failures (expect 50)": endpoint.failures,
+        "Cooldown Capped (expect True)": endpoint.unhealthy_until - time.time() <= MAX_COOLDOWN_SECONDS,
+    }
+
+
+def router_routes():
+    router = LLMRouter(large_endpoints=["http://large"], local_endpoints=["http://local"])
+    router.local.endpoints[0].llm = FakeLLM("http://local", error=http_error(400))
+    router.large.endpoints[0].llm = FakeLLM("http://large")
+
+    router._chat_completion("system", "motor runs when start button pressed and emergency stop not active")
+    template_route = router.last_route
+    router._chat_completion("system", "motor runs when temperature is low")
+    escalated_route = router.last_route
+    return {
+        "Template Prompt": template_route,
+        "Local 4xx Escalates To": escalated_route,
+    }
+
+
+def malformed_local_response():
+    routes = {}
+    for label, error in [
+        ("LLMResponseError", LLMResponseError("Invalid LLM response format")),
+        ("JSONDecodeError", requests.JSONDecodeError("Expecting value", "<html>", 0)),
+    ]:
+        router = LLMRouter(large_endpoints=["http://large"], local_endpoints=["http://local"])
+        router.local.endpoints[0].llm = FakeLLM("http://local", error=error)
+        router.large.endpoints[0].llm = FakeLLM("http://large")
+        router._chat_completion("system", "motor runs when temperature is low")
+        routes[f"{label} Escalates To"] = router.last_route
+        routes[f"{label} Local Failures (expect 0)"] = router.local.endpoints[0].failures
+    return routes
+
+
+def overlapping_usage():
+    # Both requests are in flight on the same endpoint at once
+    release = threading.Event()
+    shared = FakeLLM("http://a", release=release)
+    pool = fake_pool(shared)
+    usages = {}
+
+    def call(prompt):
+        usages[prompt] = pool.complete("system", prompt)[1]
+
+    threads = [threading.Thread(target=call, args=(prompt,)) for prompt in ("short", "a longer prompt")]
+    for thread in threads:
+        thread.start()
+    while shared.calls < 2:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    return {
+        "Short Prompt Tokens (expect 5)": usages["short"]["total_tokens"],
+        "Longer Prompt Tokens (expect 15)": usages["a longer prompt"]["total_tokens"],
+    }
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.status_code = 200
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def interface_response_parsing():
+    results = {}
+    original = llm_interface.requests.post
+    try:
+        for label, body in [
+            ("Valid", '{"choices": [{"message": {"content": "X"}}], "usage": {"total_tokens": 3}}'),
+            ("Not JSON", "<html>502 Bad Gateway</html>"),
+            ("No Choices", '{"error": "overloaded"}'),
+        ]:
+            llm_interface.requests.post = lambda url, **kwargs: FakeResponse(body)
+            try:
+                results[label] = LLMInterface()._chat_completion_with_usage("system", "user")
+            except LLMResponseError as e:
+                results[label] = type(e).__name__
+    finally:
+        llm_interface.requests.post = original
+    return results
+
+
+if __name__ == "__main__":
+
+    # 1️⃣ Template fast path hits and misses
+    run_test("Template Hits And Misses", template_hits_and_misses)
+
+    # 2️⃣ Least in-flight endpoint is chosen
+    run_test("Least In Flight", least_in_flight)
+
+    # 3️⃣ Connection failure fails over and cools the endpoint down
+    run_test("Failover", failover)
+
+    # 4️⃣ A 4xx is the request's fault — raised, no cooldown
+    run_test("No Cooldown On 4xx", no_cooldown_on_4xx)
+
+    # 5️⃣ Repeated 5xx backoff stays under MAX_COOLDOWN_SECONDS
+    run_test("Capped Backoff", capped_backoff)
+
+    # 6️⃣ Router picks template, then escalates past a failing local tier
+    run_test("Router Routes", router_routes)
+
+    # 7️⃣ Malformed local response escalates instead of failing the attempt
+    run_test("Malformed Local Response", malformed_local_response)
+
+    # 8️⃣ Overlapping requests on one endpoint keep their own token usage
+    run_test("Overlapping Usage", overlapping_usage)
+
+    # 9️⃣ LLMInterface turns a malformed body into LLMResponseError
+    run_test("Interface Response Parsing", interface_response_parsing)
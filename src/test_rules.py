@@ -0,0 +1,125 @@
+from safelogic_engine import check_mandatory_signal
+
+
+def run_test(name, expression, output_variable=None):
+    print("\n==============================")
+    print(f"TEST: {name}")
+    print("==============================")
+    print("Expression:", expression)
+    print("Output:", output_variable)
+
+    result = check_mandatory_signal(expression, output_variable)
+
+    print("Status:", result.get("status"))
+    print("Risk Level:", result.get("risk_level"))
+    print("Reason:", result.get("reason"))
+
+
+if __name__ == "__main__":
+
+    # 1️⃣ Exact signal match — OverloadRelayAux is not OverloadRelay
+    run_test(
+        "No Substring Match",
+        "StartButton AND OverloadRelayAux AND NOT EmergencyStopButton"
+    )
+
+    # 2️⃣ Alias resolves to EmergencyStopButton
+    run_test(
+        "Estop Alias",
+        "StartButton AND NOT EStop"
+    )
+
+    # 3️⃣ Multi-signal condition (RULE-007)
+    run_test(
+        "Remote Start With Manual Override",
+        "(RemoteStart AND ManualOverride) AND NOT EmergencyStopButton"
+    )
+
+    # 4️⃣ Forbidden signal negated — OverloadRelay cuts the output
+    run_test(
+        "Overload Negated",
+        "StartButton AND NOT OverloadRelay AND NOT EmergencyStopButton"
+    )
+
+    # 5️⃣ Scoped rule — RULE-004 guards MotorRun only
+    run_test(
+        "Overload On Motor",
+        "StartButton AND OverloadRelay AND NOT EmergencyStopButton",
+        "MotorRun"
+    )
+    run_test(
+        "Overload On Other Output",
+        "StartButton AND OverloadRelay AND NOT EmergencyStopButton",
+        "ConveyorRun"
+    )
+
+    # 6️⃣ Required interlock for Press* outputs (RULE-006)
+    run_test(
+        "Press Without Guard Interlock",
+        "StartButton AND NOT EmergencyStopButton",
+        "PressRun"
+    )
+
+    # Interlock negated only inside an OR / XOR group — StartButton alone
+    # energizes the press with the door open
+    run_test(
+        "Guard Interlock Inside OR Group",
+        "(NOT SafetyDoorOpen OR StartButton) AND NOT EmergencyStopButton",
+        "PressRun"
+    )
+    run_test(
+        "Guard Interlock Inside XOR",
+        "(StartButton XOR SafetyDoorOpen) AND NOT EmergencyStopButton",
+        "PressRun"
+    )
+    run_test(
+        "Guard Interlock On AND Spine",
+        "StartButton AND NOT SafetyDoorOpen AND NOT EmergencyStopButton",
+        "PressRun"
+    )
+
+    # 7️⃣ Parenthesized OR cut by the estop — accepted, no bypass path
+    run_test(
+        "Grouped OR With Estop Cut",
+        "(StartButton OR RemoteStart) AND NOT EmergencyStopButton",
+        "MotorRun"
+    )
+
+    # 8️⃣ Top-level OR — second path skips the estop
+    run_test(
+        "Top-Level OR Bypass",
+        "StartButton AND NOT EmergencyStopButton OR RemoteStart",
+        "MotorRun"
+    )
+    run_test(
+        "Wrapped Top-Level OR Bypass",
+        "(StartButton AND NOT EmergencyStopButton OR RemoteStart)",
+        "MotorRun"
+    )
+
+    # 9️⃣ Estop inside the OR group — B alone energizes the output
+    run_test(
+        "Estop Inside OR Group",
+        "(NOT EmergencyStopButton OR RemoteStart) AND StartButton",
+        "MotorRun"
+    )
+
+    # Mandatory signal matched by exact name, not as a substring
+    run_test(
+        "Estop Name As Substring",
+        "StartButton AND NOT EmergencyStopButtonBypass",
+        "MotorRun"
+    )
+
+    # Estop negated only inside an XOR — StartButton energizes with estop pressed
+    run_test(
+        "Estop Inside XOR",
+        "StartButton XOR NOT EmergencyStopButton",
+        "MotorRun"
+    )
+
+    # 🔟 Malformed expression
+    run_test(
+        "Malformed Expression",
+        "StartButton AND AND NOT EmergencyStopButton"
+    )
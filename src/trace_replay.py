@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from expression_parser import parse_expression, variables
+from safelogic_engine import COMPILED_RULES, RULES, extract_expression
+
+# Scan cycles evaluated per chunk — bounds memory regardless of trace length
+DEFAULT_CHUNK_SCANS = 1_000_000
+
+
+def load_trace(trace_path, signal_names=None):
+    """
+    Open a recorded I/O trace without reading it into memory.
+    The trace is a 2-D .npy array (one row per scan cycle, one column per signal).
+    Signal names come from the argument or from the sidecar '<trace>.signals.json'.
+    """
+    trace = np.load(trace_path, mmap_mode="r")
+    if trace.ndim != 2:
+        raise ValueError(f"Trace must be 2-D (scans x signals), got shape {trace.shape}")
+
+    if signal_names is None:
+        with open(trace_path + ".signals.json", "r") as f:
+            signal_names = json.load(f)
+
+    if len(signal_names) != trace.shape[1]:
+        raise ValueError(
+            f"Trace has {trace.shape[1]} columns but {len(signal_names)} signal names were given"
+        )
+    return trace, {name: i for i, name in enumerate(signal_names)}
+
+
+def compile_expression(node):
+    """
+    Compile a parsed expression into a function over a chunk of trace columns.
+    The returned function takes a dict of signal -> bool ndarray and returns
+    a bool ndarray with one entry per scan.
+    """
+    kind = node[0]
+    if kind == "var":
+        name = node[1]
+        return lambda cols: cols[name]
+    if kind == "const":
+        value = node[1]
+        return lambda cols: np.bool_(value)
+    if kind == "not":
+        inner = compile_expression(node[1])
+        return lambda cols: np.logical_not(inner(cols))
+
+    reduce = {"and": np.logical_and, "or": np.logical_or, "xor": np.logical_xor}[kind]
+    children = [compile_expression(child) for child in node[1]]
+
+    def combine(cols):
+        result = children[0](cols)
+        for child in children[1:]:
+            result = reduce(result, child(cols))
+        return result
+
+    return combine
+
+
+def canonical_signal_index(signal_index, compiled_rules=COMPILED_RULES):
+    """Map trace column names through signal_aliases to their canonical signal."""
+    canonical = {}
+    for name, column in signal_index.items():
+        signal = compiled_rules.aliases.get(name, name)
+        if signal in canonical and canonical[signal] != column:
+            raise ValueError(f"Trace has more than one column for signal {signal} (via alias {name})")
+        canonical[signal] = column
+    return canonical
+
+
+def hazard_conditions(output_variable, rules=RULES, compiled_rules=COMPILED_RULES):
+    """
+    Signal sets that must never all be active while the output is energized:
+    mandatory negated signals, forbidden_active combinations and required
+    interlocks of every compiled rule in scope for this output.
+    """
+    canonical = lambda name: compiled_rules.aliases.get(name, name)
+    hazards = []
+    mandatory = {canonical(s["signal"]) for s in rules.get("mandatory_safety_signals", []) if s.get("must_be_negated")}
+    mandatory.add("EmergencyStopButton")
+    for signal in sorted(mandatory):
+        hazards.append({"rule": "MANDATORY", "signals": [signal]})
+
+    for rule in compiled_rules.rules_in_scope(output_variable):
+        if rule["forbidden_active"]:
+            hazards.append({"rule": rule["id"], "signals": rule["forbidden_active"]})
+        for signal in rule["required_interlocks"]:
+            hazards.append({"rule": rule["id"], "signals": [signal]})
+    return hazards
+
+
+def replay_trace(plc_code, trace, signal_index, chunk_scans=DEFAULT_CHUNK_SCANS, rules=RULES,
+                 compiled_rules=COMPILED_RULES):
+    """
+    Replay a recorded trace against a PLC assignment, chunk by chunk.
+    Signal aliases are resolved in both the expression and the column names.
+    Yields one dict per scan where the output was energized while a hazard
+    condition (estop, forbidden combination or missing interlock) was active.
+    """
+    extracted = extract_expression(plc_code)
+    if not extracted:
+        raise ValueError("No output assignment detected")
+
+    output_variable = extracted["output_variable"]
+    signal_index = canonical_signal_index(signal_index, compiled_rules)
+    node = parse_expression(compiled_rules.canonicalize(extracted["expression"]))
+    missing = variables(node) - set(signal_index)
+    if missing:
+        raise ValueError(f"Trace has no column for signals: {', '.join(sorted(missing))}")
+
+    # A hazard that cannot be observed cannot be ruled out — never report it SAFE
+    hazards = hazard_conditions(output_variable, rules, compiled_rules)
+    hazard_names = {signal for hazard in hazards for signal in hazard["signals"]}
+    unmonitored = hazard_names - set(signal_index)
+    if unmonitored:
+        raise ValueError(f"Trace has no column for hazard signals: {', '.join(sorted(unmonitored))}")
+
+    evaluate = compile_expression(node)
+    needed = variables(node) | hazard_names
+
+    for start in range(0, trace.shape[0], chunk_scans):
+        chunk = trace[start:start + chunk_scans]
+        cols = {name: np.asarray(chunk[:, signal_index[name]], dtype=bool) for name in needed}
+
+        energized = evaluate(cols)
+        active = []
+        unsafe = np.zeros(len(chunk), dtype=bool)
+        for hazard in hazards:
+            condition = cols[hazard["signals"][0]]
+            for signal in hazard["signals"][1:]:
+                condition = condition & cols[signal]
+            active.append(condition)
+            unsafe |= condition
+        unsafe &= energized
+
+        for offset in np.flatnonzero(unsafe):
+            yield {
+                "scan": start + int(offset),
+                "output_variable": output_variable,
+                "active_hazards": [
+                    hazard for hazard, condition in zip(hazards, active) if condition[offset]
+                ],
+            }
+
+
+def replay_summary(plc_code, trace, signal_index, chunk_scans=DEFAULT_CHUNK_SCANS, rules=RULES,
+                   compiled_rules=COMPILED_RULES, max_examples=20):
+    """Run replay_trace over the whole trace and collect counts plus the first violations."""
+    violations = 0
+    by_rule = {}
+    examples = []
+    for violation in replay_trace(plc_code, trace, signal_index, chunk_scans, rules, compiled_rules):
+        violations += 1
+        for hazard in violation["active_hazards"]:
+            by_rule[hazard["rule"]] = by_rule.get(hazard["rule"], 0) + 1
+        if len(examples) < max_examples:
+            examples.append(violation)
+
+    return {
+        "status": "VIOLATION" if violations else "SAFE",
+        "scans": int(trace.shape[0]),
+        "violating_scans": violations,
+        "violations_by_rule": by_rule,
+        "examples": examples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded I/O trace against PLC logic")
+    parser.add_argument("trace", help="Path to .npy trace (scans x signals)")
+    parser.add_argument("plc_code", help="PLC assignment, e.g. 'MotorRun := StartButton AND NOT EmergencyStopButton;'")
+    parser.add_argument("--chunk-scans", type=int, default=DEFAULT_CHUNK_SCANS)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.trace):
+        parser.error(f"Trace not found: {args.trace}")
+
+    trace, signal_index = load_trace(args.trace)
+    summary = replay_summary(args.plc_code, trace, signal_index, args.chunk_scans)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()